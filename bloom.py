@@ -2,52 +2,162 @@ import math
 import hashlib
 from typing import Iterable
 
+try:
+    # Non-cryptographic and several times faster than blake2b on short keys
+    from xxhash import xxh3_64_intdigest as _hash64
+except ImportError:  # optional dependency: pip install file-manipulator[fast]
+    def _hash64(item: bytes) -> int:
+        return int.from_bytes(hashlib.blake2b(item, digest_size=8).digest(), "little")
+
+# Split block Bloom filter salts: one odd multiplier per 32-bit lane of a block.
+_SALT = (
+    0x47B6137B,
+    0x44974D91,
+    0x8824AD5B,
+    0xA2B7289D,
+    0x705495C7,
+    0x2DF1424B,
+    0x9EFC4947,
+    0x5C6BFB31,
+)
+_LANE_BITS = 32
+_BLOCK_BITS = _LANE_BITS * len(_SALT)  # 256 bits
+_BLOCK_BYTES = _BLOCK_BITS // 8
+# Salts spaced 64 bits apart: key * _PACKED_SALT computes every key * salt without carries
+_PACKED_SALT = sum(salt << (64 * lane) for lane, salt in enumerate(_SALT))
+# _LANE_MASKS[lane][bit]: the block-wide int with only that lane bit set
+_LANE_MASKS = tuple(tuple(1 << (lane * _LANE_BITS + bit) for bit in range(_LANE_BITS)) for lane in range(len(_SALT)))
+# With k fixed at 8, bits per item blow up below this rate (~65 at 1e-6, ~177 at 1e-8)
+_MIN_FPR = 1e-6
+
+
+def _split_block_fpr(items_per_block: float) -> float:
+    """
+    Expected FPR of a split block filter whose blocks hold `items_per_block` items on
+    average. Block loads are Poisson; a block holding j items has each lane bit set
+    with probability 1 - (1 - 1/32)^j, and a false positive needs all 8 lane bits.
+    """
+    lam = items_per_block
+    spread = 10 * math.sqrt(lam) + 20
+    fpr = 0.0
+    for j in range(max(0, int(lam - spread)), int(lam + spread) + 1):
+        # Poisson pmf in log space so large loads do not underflow exp(-lam)
+        pmf = math.exp(-lam + (j * math.log(lam) if j else 0.0) - math.lgamma(j + 1))
+        fpr += pmf * (1 - (1 - 1 / _LANE_BITS) ** j) ** len(_SALT)
+    return fpr
+
+
+def _num_blocks_for(expected_items: int, false_positive_rate: float) -> int:
+    """Smallest block count whose predicted split block FPR is <= false_positive_rate."""
+    def fits(num_blocks: int) -> bool:
+        return _split_block_fpr(expected_items / num_blocks) <= false_positive_rate
+
+    # The FPR falls as blocks are added. Start from the classic (unblocked) size, which
+    # the blocked layout never beats, double to bracket the answer, then bisect.
+    classic_bits = -expected_items * math.log(false_positive_rate) / (math.log(2) ** 2)
+    lo, hi = 0, max(1, int(classic_bits // _BLOCK_BITS))
+    while not fits(hi):
+        lo, hi = hi, hi * 2
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if fits(mid):
+            hi = mid
+        else:
+            lo = mid
+    return hi
+
 
 class BloomFilter:
     """
     Space-efficient probabilistic set with false positives (no false negatives).
-    Uses double hashing: h(i) = (h1 + i*h2) % m
+    Blocked (split block) layout: each item maps to a single 256-bit block made of
+    eight 32-bit lanes, and sets exactly one bit per lane. A query touches one
+    contiguous block instead of k scattered bytes. A single 64-bit hash (xxh3 when
+    installed, blake2b otherwise) feeds both the block index and the lane mask.
 
-    m (bits) and k (hashes) chosen from expected n and false positive rate p:
-      m = - (n * ln p) / (ln 2)^2
-      k = (m / n) * ln 2
+    k is fixed at 8 (one bit per lane). The number of blocks is the smallest one whose
+    predicted FPR for expected n items, with Poisson-distributed block loads, is at
+    most p. This takes more bits than the classic m = -(n * ln p) / (ln 2)^2, increasingly
+    so for small p, where the optimal k would exceed 8; p below 1e-6 is rejected. The
+    rate observed for one particular filter scatters around the expected one by a few percent.
     """
 
     def __init__(self, expected_items: int, false_positive_rate: float = 0.001):
         if expected_items <= 0:
             raise ValueError("expected_items must be > 0")
-        if not (0 < false_positive_rate < 1):
-            raise ValueError("false_positive_rate must be in (0,1)")
-        self.m_bits = max(8, int(-expected_items * math.log(false_positive_rate) / (math.log(2) ** 2)))
-        self.k_hashes = max(1, int(round((self.m_bits / expected_items) * math.log(2))))
-        self._bytes = bytearray((self.m_bits + 7) // 8)
-
-    def _hashes(self, item: bytes):
-        # Use blake2b to derive two 64-bit hashes; supports bytes
-        h = hashlib.blake2b(item, digest_size=16).digest()
-        h1 = int.from_bytes(h[:8], "big")
-        h2 = int.from_bytes(h[8:], "big")
-        if h2 == 0:
-            h2 = 0x9e3779b97f4a7c15  # golden ratio constant
-        for i in range(self.k_hashes):
-            yield (h1 + i * h2) % self.m_bits
-
-    def _set_bit(self, idx: int):
-        b = idx // 8
-        bit = idx % 8
-        self._bytes[b] |= (1 << bit)
-
-    def _get_bit(self, idx: int) -> bool:
-        b = idx // 8
-        bit = idx % 8
-        return (self._bytes[b] >> bit) & 1 == 1
+        if not (_MIN_FPR <= false_positive_rate < 1):
+            raise ValueError(f"false_positive_rate must be in [{_MIN_FPR:g},1)")
+        self.num_blocks = _num_blocks_for(expected_items, false_positive_rate)
+        self.m_bits = self.num_blocks * _BLOCK_BITS
+        self.k_hashes = len(_SALT)
+        self._blocks = bytearray(self.num_blocks * _BLOCK_BYTES)
+
+    def _block_index(self, h: int) -> int:
+        # fastrange: scale the upper 32 hash bits onto [0, num_blocks) without a modulo
+        return ((h >> 32) * self.num_blocks) >> 32
+
+    @staticmethod
+    def _make_mask(h: int) -> int:
+        # The top 5 bits of the low 32 bits of (key * salt) pick one bit in each lane.
+        # One multiply by the packed salts yields all eight products at once; the top
+        # byte of each product's low word sits at offset 8*lane + 3.
+        p = ((h & 0xFFFFFFFF) * _PACKED_SALT).to_bytes(64, "little")
+        m0, m1, m2, m3, m4, m5, m6, m7 = _LANE_MASKS
+        return (
+            m0[p[3] >> 3] | m1[p[11] >> 3] | m2[p[19] >> 3] | m3[p[27] >> 3]
+            | m4[p[35] >> 3] | m5[p[43] >> 3] | m6[p[51] >> 3] | m7[p[59] >> 3]
+        )
 
     def add(self, item: bytes):
-        for idx in self._hashes(item):
-            self._set_bit(idx)
+        h = _hash64(item)
+        off = self._block_index(h) * _BLOCK_BYTES
+        end = off + _BLOCK_BYTES
+        block = int.from_bytes(self._blocks[off:end], "little")
+        self._blocks[off:end] = (block | self._make_mask(h)).to_bytes(_BLOCK_BYTES, "little")
 
     def __contains__(self, item: bytes) -> bool:
-        return all(self._get_bit(idx) for idx in self._hashes(item))
+        h = _hash64(item)
+        off = self._block_index(h) * _BLOCK_BYTES
+        mask = self._make_mask(h)
+        return int.from_bytes(self._blocks[off:off + _BLOCK_BYTES], "little") & mask == mask
+
+    def test_and_set(self, item: bytes) -> bool:
+        """
+        Adds item and returns whether it was (probably) already present.
+        Hashes once and loads/stores the block once, unlike `in` followed by add().
+        """
+        h = _hash64(item)
+        off = self._block_index(h) * _BLOCK_BYTES
+        end = off + _BLOCK_BYTES
+        mask = self._make_mask(h)
+        block = int.from_bytes(self._blocks[off:end], "little")
+        if block & mask == mask:
+            return True
+        self._blocks[off:end] = (block | mask).to_bytes(_BLOCK_BYTES, "little")
+        return False
+
+    def test_and_set_many(self, items: list[bytes]) -> list[bool]:
+        """
+        Batched test_and_set(): returns, per item in order, whether it was already present.
+        The whole batch is hashed up front, then blocks are probed in sequence with the
+        hot attributes bound once, so duplicates inside the batch are still detected.
+        """
+        blocks = self._blocks
+        num_blocks = self.num_blocks
+        make_mask = self._make_mask
+        from_bytes = int.from_bytes
+        present: list[bool] = []
+        for h in list(map(_hash64, items)):
+            off = (((h >> 32) * num_blocks) >> 32) * _BLOCK_BYTES
+            end = off + _BLOCK_BYTES
+            mask = make_mask(h)
+            block = from_bytes(blocks[off:end], "little")
+            if block & mask == mask:
+                present.append(True)
+            else:
+                blocks[off:end] = (block | mask).to_bytes(_BLOCK_BYTES, "little")
+                present.append(False)
+        return present
 
     def add_str(self, s: str, encoding: str = "utf-8"):
         self.add(s.encode(encoding))
@@ -55,9 +165,39 @@ class BloomFilter:
     def contains_str(self, s: str, encoding: str = "utf-8") -> bool:
         return self.__contains__(s.encode(encoding))
 
+    def union(self, other: "BloomFilter") -> "BloomFilter":
+        """
+        ORs other's bits into this filter (in place) and returns self. Filters built
+        over separate shards union to the filter of all their items.
+        """
+        if self.m_bits != other.m_bits or self.k_hashes != other.k_hashes:
+            raise ValueError("union requires filters with the same m_bits and k_hashes")
+        merged = int.from_bytes(self._blocks, "little") | int.from_bytes(other._blocks, "little")
+        self._blocks[:] = merged.to_bytes(len(self._blocks), "little")
+        return self
+
+    def to_bytes(self) -> bytes:
+        """Raw block array, e.g. to persist a filter or ship it to another process."""
+        return bytes(self._blocks)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "BloomFilter":
+        """
+        Rebuilds a filter from to_bytes() output. Both sides must use the same hash
+        (xxh3 vs blake2b fallback), i.e. the same optional dependencies installed.
+        """
+        if not data or len(data) % _BLOCK_BYTES:
+            raise ValueError(f"data length must be a positive multiple of {_BLOCK_BYTES}")
+        bf = cls.__new__(cls)
+        bf.num_blocks = len(data) // _BLOCK_BYTES
+        bf.m_bits = bf.num_blocks * _BLOCK_BITS
+        bf.k_hashes = len(_SALT)
+        bf._blocks = bytearray(data)
+        return bf
+
     @classmethod
     def from_iterable(cls, items: Iterable[bytes], expected_items: int, false_positive_rate: float = 0.001):
         bf = cls(expected_items, false_positive_rate)
         for it in items:
             bf.add(it)
-        return bf
\ No newline at end of file
+        return bf
@@ -1,39 +1,120 @@
 import argparse
+import os
+import shutil
 import sys
-from typing import Optional
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import BinaryIO, Iterator, Optional
 
-from .bloom import BloomFilter
+from .bloom import _MIN_FPR, BloomFilter
 from .reservoir import reservoir_sample_file
 from .stats import compute_file_stats
 from .external_sort import external_sort
+from .utils import digest128, iter_lines_bytes, split_line_ranges
+
+# Read buffer for commands that iterate the input file object directly
+_IO_BUFFER_SIZE = 1 << 20
+# Lines handed to the Bloom filter per test_and_set_many() call
+_DEDUP_BATCH_LINES = 1024
+# dedup-exact fingerprints only lines longer than this: below it the per-line hash costs
+# more time than the memory it saves is worth
+_FINGERPRINT_MIN_LEN = 64
+
+
+def _dedup_approx_lines(seen: BloomFilter, lines: Iterator[bytes], w: BinaryIO) -> int:
+    written = 0
+    # Lines are opaque bytes: no decode on read, no encode before hashing.
+    # Probing a batch at a time amortizes per-call overhead in the filter.
+    while batch := list(islice(lines, _DEDUP_BATCH_LINES)):
+        unique = [line for line, dup in zip(batch, seen.test_and_set_many(batch)) if not dup]
+        w.writelines(unique)
+        written += len(unique)
+    return written
+
+
+def _dedup_approx_shard_filter(path: str, start: int, end: int, expected: int, fpr: float) -> bytes:
+    # Runs in a worker process: the filter of every line in one byte range, nothing written
+    bf = BloomFilter(expected_items=expected, false_positive_rate=fpr)
+    lines = iter_lines_bytes(path, start=start, end=end)
+    while batch := list(islice(lines, _DEDUP_BATCH_LINES)):
+        bf.test_and_set_many(batch)
+    return bf.to_bytes()
+
+
+def _dedup_approx_shard(path: str, start: int, end: int, seed: bytes, out_path: str) -> int:
+    # Runs in a worker process: dedup one byte range against a filter seeded with every
+    # line before it, writing the survivors to out_path
+    with open(out_path, "wb") as w:
+        return _dedup_approx_lines(BloomFilter.from_bytes(seed), iter_lines_bytes(path, start=start, end=end), w)
+
+
+def _dedup_approx_parallel(args: argparse.Namespace, bf: BloomFilter) -> int:
+    """
+    Shard-parallel dedup over contiguous byte ranges, in two worker passes.
+    First each worker builds the filter of its own shard. The parent ORs these into
+    prefix unions: the seed of shard j holds exactly the bits the serial pass has set
+    by the time it reaches shard j. Then each worker runs test_and_set_many() over its
+    shard starting from its seed, so the output is identical to the serial pass.
+    Every line is hashed twice, so N workers speed up the serial pass at most N/2 times.
+    """
+    ranges = split_line_ranges(args.input, args.parallel)
+    starts = [start for start, _ in ranges]
+    ends = [end for _, end in ranges]
+    tmp_base = tempfile.mkdtemp(prefix="dedup_", dir=os.path.dirname(os.path.abspath(args.output)))
+    try:
+        shard_paths = [os.path.join(tmp_base, f"shard_{i:06d}") for i in range(len(ranges))]
+        with ProcessPoolExecutor(max_workers=args.parallel) as pool:
+            shard_filters = pool.map(
+                _dedup_approx_shard_filter,
+                [args.input] * len(ranges),
+                starts,
+                ends,
+                [args.expected] * len(ranges),
+                [args.fpr] * len(ranges),
+            )
+            seeds: list[bytes] = []
+            for shard_filter in shard_filters:
+                seeds.append(bf.to_bytes())
+                bf.union(BloomFilter.from_bytes(shard_filter))
+            written = sum(
+                pool.map(_dedup_approx_shard, [args.input] * len(ranges), starts, ends, seeds, shard_paths)
+            )
+        with open(args.output, "wb") as w:
+            for shard_path in shard_paths:
+                with open(shard_path, "rb") as r:
+                    shutil.copyfileobj(r, w, _IO_BUFFER_SIZE)
+        return written
+    finally:
+        shutil.rmtree(tmp_base, ignore_errors=True)
 
 
 def cmd_dedup_approx(args: argparse.Namespace) -> int:
     bf = BloomFilter(expected_items=args.expected, false_positive_rate=args.fpr)
-    seen = bf
-    written = 0
-    with open(args.input, "r", encoding="utf-8", errors="ignore") as r, open(
-        args.output, "w", encoding="utf-8", errors="ignore"
-    ) as w:
-        for line in r:
-            # Use bytes to avoid cost of re-encoding repeatedly; but here we can use str
-            if not seen.contains_str(line):
-                w.write(line)
-                seen.add_str(line)
-                written += 1
+    if args.parallel > 1:
+        written = _dedup_approx_parallel(args, bf)
+    else:
+        with open(args.output, "wb") as w:
+            written = _dedup_approx_lines(bf, iter_lines_bytes(args.input), w)
     print(f"Wrote {written} unique lines (approx; FPR~{args.fpr}, k={bf.k_hashes}, m_bits={bf.m_bits})", file=sys.stderr)
     return 0
 
 
 def cmd_dedup_exact(args: argparse.Namespace) -> int:
-    seen: set[str] = set()
+    # Long lines are stored as 128-bit fingerprints, so their memory no longer grows with
+    # line length. Hashing costs time (blake2b unless xxhash is installed) and saves
+    # little for short lines, so lines up to _FINGERPRINT_MIN_LEN bytes are kept as-is.
+    # That length test is not free: ~2% on input where no line is long enough to be
+    # fingerprinted. The file object is iterated directly, without the extra generator
+    # layer of iter_lines_bytes(), which cost several times that.
+    # A false duplicate needs a 128-bit collision, negligible for any realistic input.
+    seen: set[bytes] = set()
     written = 0
-    with open(args.input, "r", encoding="utf-8", errors="ignore") as r, open(
-        args.output, "w", encoding="utf-8", errors="ignore"
-    ) as w:
+    with open(args.input, "rb", buffering=_IO_BUFFER_SIZE) as r, open(args.output, "wb") as w:
         for line in r:
-            if line not in seen:
-                seen.add(line)
+            fp = line if len(line) <= _FINGERPRINT_MIN_LEN else digest128(line)
+            if fp not in seen:
+                seen.add(fp)
                 w.write(line)
                 written += 1
     print(f"Wrote {written} unique lines (exact). Memory used grows with number of unique lines.", file=sys.stderr)
@@ -42,7 +123,8 @@ def cmd_dedup_exact(args: argparse.Namespace) -> int:
 
 def cmd_sample(args: argparse.Namespace) -> int:
     sample = reservoir_sample_file(args.input, args.k)
-    sys.stdout.writelines(sample)
+    sys.stdout.flush()
+    sys.stdout.buffer.writelines(sample)
     return 0
 
 
@@ -61,27 +143,39 @@ def cmd_stats(args: argparse.Namespace) -> int:
 
 
 def cmd_sort(args: argparse.Namespace) -> int:
-    def key_func(line: str):
-        if args.numeric:
-            # Strip newline and parse float for numeric sort
-            try:
-                return float(line.strip())
-            except ValueError:
-                # Non-numeric lines sort last
-                return float("inf") if not args.reverse else float("-inf")
-        return line
-
     external_sort(
         args.input,
         args.output,
-        key=key_func,
         reverse=args.reverse,
         max_lines_in_memory=args.chunk_lines,
         tmp_dir=args.tmpdir,
+        numeric=args.numeric,
+        merge_fanout=args.merge_fanout,
+        workers=args.workers,
     )
     return 0
 
 
+def _fpr_arg(value: str) -> float:
+    try:
+        fpr = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a number: {value!r}")
+    if not (_MIN_FPR <= fpr < 1):
+        raise argparse.ArgumentTypeError(f"must be in [{_MIN_FPR:g}, 1)")
+    return fpr
+
+
+def _merge_fanout_arg(value: str) -> int:
+    try:
+        fanout = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not an integer: {value!r}")
+    if fanout < 2:
+        raise argparse.ArgumentTypeError("must be >= 2")
+    return fanout
+
+
 def build_parser() -> argparse.ArgumentParser:
     p = argparse.ArgumentParser(prog="file-manipulator", description="File utilities using DS&A for large-scale data.")
     sub = p.add_subparsers(dest="cmd", required=True)
@@ -89,11 +183,16 @@ def build_parser() -> argparse.ArgumentParser:
     sp = sub.add_parser("dedup-approx", help="Approximate deduplication using a Bloom filter (low memory, small FPR).")
     sp.add_argument("input", help="Input text file")
     sp.add_argument("output", help="Output file for unique lines")
-    sp.add_argument("--fpr", type=float, default=0.001, help="Target false positive rate (default: 0.001)")
+    sp.add_argument(
+        "--fpr", type=_fpr_arg, default=0.001, help="Target false positive rate, at least 1e-6 (default: 0.001)"
+    )
     sp.add_argument("--expected", type=int, required=True, help="Expected number of unique lines")
+    sp.add_argument(
+        "--parallel", type=int, default=1, help="Dedup N contiguous shards in worker processes (default: 1)"
+    )
     sp.set_defaults(func=cmd_dedup_approx)
 
-    sp = sub.add_parser("dedup-exact", help="Exact deduplication using a hash set (higher memory).")
+    sp = sub.add_parser("dedup-exact", help="Exact deduplication using a hash set; long lines stored as 128-bit fingerprints (higher memory).")
     sp.add_argument("input", help="Input text file")
     sp.add_argument("output", help="Output file for unique lines")
     sp.set_defaults(func=cmd_dedup_exact)
@@ -115,6 +214,15 @@ def build_parser() -> argparse.ArgumentParser:
     sp.add_argument("--numeric", action="store_true", help="Sort numerically (parse float)")
     sp.add_argument("--chunk-lines", type=int, default=500_000, help="Lines per in-memory chunk (default: 500k)")
     sp.add_argument("--tmpdir", default=None, help="Optional temp directory for sort chunks")
+    sp.add_argument(
+        "--merge-fanout", type=_merge_fanout_arg, default=64, help="Max chunk files merged at once; more triggers multi-pass merge (default: 64)"
+    )
+    sp.add_argument(
+        "--workers",
+        type=int,
+        default=min(os.cpu_count() or 1, 4),
+        help="Processes sorting chunks in parallel; 1 disables the pool (default: min(cpus, 4))",
+    )
     sp.set_defaults(func=cmd_sort)
 
     return p
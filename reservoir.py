@@ -1,27 +1,50 @@
+import math
 import random
+import sys
 from collections import deque
-from typing import Iterable, Iterator
+from itertools import islice
+from typing import Iterable, Iterator, TypeVar
 
+from .utils import iter_lines_bytes
 
-def reservoir_sample(iterable: Iterable[str], k: int, rng: random.Random | None = None) -> list[str]:
+T = TypeVar("T")
+
+_EXHAUSTED = object()
+
+
+def _open_unit(r) -> float:
+    """Uniform draw from the open interval (0, 1), safe to take log() of."""
+    u = r.random()
+    while u == 0.0:
+        u = r.random()
+    return u
+
+
+def reservoir_sample(iterable: Iterable[T], k: int, rng: random.Random | None = None) -> list[T]:
     """
     Uniform random sample of size k from an iterable of unknown/large size.
-    Algorithm R (Vitter): O(n) time, O(k) memory.
+    Algorithm L (Li): instead of drawing a random index per item, draw the
+    geometric gap to the next replacement and skip over it.
+    O(n) iteration but only O(k (1 + log(n/k))) random draws, O(k) memory.
     """
     if k <= 0:
         return []
     r = rng or random
-    reservoir: list[str] = []
-    for i, item in enumerate(iterable):
-        if i < k:
-            reservoir.append(item)
-        else:
-            j = r.randint(0, i)
-            if j < k:
-                reservoir[j] = item
-    return reservoir
-
-
-def reservoir_sample_file(path: str, k: int, rng: random.Random | None = None) -> list[str]:
-    with open(path, "r", encoding="utf-8", errors="ignore") as f:
-        return reservoir_sample(f, k, rng=rng)
\ No newline at end of file
+    it = iter(iterable)
+    reservoir: list[T] = list(islice(it, k))
+    if len(reservoir) < k:
+        return reservoir
+    w = math.exp(math.log(_open_unit(r)) / k)
+    while True:
+        skip = min(math.floor(math.log(_open_unit(r)) / math.log1p(-w)), sys.maxsize)
+        # Consume `skip` items without looking at them
+        next(islice(it, skip, skip), None)
+        item = next(it, _EXHAUSTED)
+        if item is _EXHAUSTED:
+            return reservoir
+        reservoir[r.randrange(k)] = item
+        w *= math.exp(math.log(_open_unit(r)) / k)
+
+
+def reservoir_sample_file(path: str, k: int, rng: random.Random | None = None) -> list[bytes]:
+    return reservoir_sample(iter_lines_bytes(path), k, rng=rng)
@@ -1,6 +1,25 @@
 import csv
 import math
 from dataclasses import dataclass
+from itertools import islice
+from typing import Iterator, Sequence
+
+# Read buffer for the column scan
+_IO_BUFFER_SIZE = 1 << 20
+# Values buffered per batch before folding them into the running aggregate
+_BATCH_SIZE = 1 << 16
+
+
+def _welford_batch(values: Sequence[float]) -> tuple[int, float, float, float, float]:
+    """
+    Reduce a non-empty batch to (count, mean, M2, min, max).
+    Two passes over an in-memory buffer: sum/min/max run as C loops, and the
+    squared deviations are taken around the batch mean for numerical stability.
+    """
+    n = len(values)
+    mean = sum(values) / n
+    M2 = sum([(x - mean) * (x - mean) for x in values])
+    return n, mean, M2, min(values), max(values)
 
 
 @dataclass
@@ -17,12 +36,37 @@ class OnlineStats:
         delta = x - self.mean
         self.mean += delta / self.count
         delta2 = x - self.mean
-        self.M2 += delta2 * delta2
+        self.M2 += delta * delta2
         if self.min_val is None or x < self.min_val:
             self.min_val = x
         if self.max_val is None or x > self.max_val:
             self.max_val = x
 
+    def update_batch(self, values: Sequence[float]):
+        """Fold in a batch of values reduced by _welford_batch(), combined via Chan's formula."""
+        if values:
+            self._combine(*_welford_batch(values))
+
+    def merge(self, other: "OnlineStats"):
+        """Chan et al. parallel combination of two partial aggregates."""
+        if other.count:
+            self._combine(other.count, other.mean, other.M2, other.min_val, other.max_val)
+
+    def _combine(self, n_b: int, mean_b: float, M2_b: float, min_b: float, max_b: float):
+        if self.count == 0:
+            self.count, self.mean, self.M2 = n_b, mean_b, M2_b
+            self.min_val, self.max_val = min_b, max_b
+            return
+        n = self.count + n_b
+        delta = mean_b - self.mean
+        self.mean += delta * n_b / n
+        self.M2 += M2_b + delta * delta * self.count * n_b / n
+        self.count = n
+        if min_b < self.min_val:
+            self.min_val = min_b
+        if max_b > self.max_val:
+            self.max_val = max_b
+
     @property
     def variance(self) -> float | None:
         if self.count < 2:
@@ -35,47 +79,82 @@ class OnlineStats:
         return math.sqrt(v) if v is not None else None
 
 
-def iter_numeric_column(file_path: str, col: int = 0):
+def _iter_token_batches(file_path: str, col: int, batch_size: int) -> Iterator[list[str | bytes]]:
+    """
+    Yields lists of at most `batch_size` raw (unparsed) fields at column `col`;
+    rows without that column are skipped.
+    """
+    # Peek first line to detect delimiter and quoting
+    with open(file_path, "rb") as f:
+        first = f.readline()
+    if b"," in first:
+        if col < 0:
+            return
+        if b'"' in first:
+            # Quoted CSV: the csv module handles quoting, including fields spanning lines
+            with open(file_path, "r", encoding="utf-8", errors="ignore", newline="") as f:
+                tokens: list[str | bytes] = []
+                for row in csv.reader(f):
+                    if len(row) > col:
+                        tokens.append(row[col])
+                        if len(tokens) >= batch_size:
+                            yield tokens
+                            tokens = []
+                if tokens:
+                    yield tokens
+            return
+        # Unquoted CSV: a plain split per line, no decoding. Quoting is sniffed from the
+        # first line only, so a file whose later lines quote fields must quote the header too.
+        # Split rows die inside the comprehension: holding a batch of them alive makes the
+        # cyclic GC rescan them over and over, which doubled the cost of this loop.
+        with open(file_path, "rb", buffering=_IO_BUFFER_SIZE) as f:
+            while batch := list(islice(f, batch_size)):
+                yield [row[col] for line in batch if len(row := line.split(b",", col + 1)) > col]
+    else:
+        # Whitespace mode: float() parses ASCII bytes directly, so skip decoding
+        with open(file_path, "rb", buffering=_IO_BUFFER_SIZE) as f:
+            while batch := list(islice(f, batch_size)):
+                yield [row[col] for line in batch if len(row := line.split()) > col]
+
+
+def _parse_floats(tokens: list[str | bytes]) -> list[float]:
+    # Whole batch through float() in one C-level map; only a batch containing a
+    # non-numeric field pays for the per-token try/except
+    try:
+        return list(map(float, tokens))
+    except (ValueError, TypeError):
+        values: list[float] = []
+        for t in tokens:
+            try:
+                values.append(float(t))
+            except (ValueError, TypeError):
+                continue
+        return values
+
+
+def iter_numeric_batches(file_path: str, col: int = 0, batch_size: int = _BATCH_SIZE) -> Iterator[list[float]]:
+    """
+    Yields lists of up to `batch_size` numeric values from column `col` (0-based).
+    Autodetects CSV vs whitespace-delimited.
+    Ignores non-parsable rows.
+    """
+    for tokens in _iter_token_batches(file_path, col, batch_size):
+        if tokens:
+            yield _parse_floats(tokens)
+
+
+def iter_numeric_column(file_path: str, col: int = 0) -> Iterator[float]:
     """
     Yields numeric values from column `col` (0-based).
     Autodetects CSV vs whitespace-delimited.
     Ignores non-parsable rows.
     """
-    # Peek first line to detect delimiter
-    with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-        first = f.readline()
-        if "," in first:
-            # CSV mode
-            f.seek(0)
-            reader = csv.reader(f)
-            for row in reader:
-                if col < 0 or col >= len(row):
-                    continue
-                try:
-                    yield float(row[col])
-                except (ValueError, TypeError):
-                    continue
-        else:
-            # Whitespace mode
-            if first:
-                parts = first.split()
-                if len(parts) > col:
-                    try:
-                        yield float(parts[col])
-                    except (ValueError, TypeError):
-                        pass
-            for line in f:
-                parts = line.split()
-                if len(parts) <= col:
-                    continue
-                try:
-                    yield float(parts[col])
-                except (ValueError, TypeError):
-                    continue
+    for batch in iter_numeric_batches(file_path, col):
+        yield from batch
 
 
 def compute_file_stats(file_path: str, col: int = 0) -> OnlineStats:
     s = OnlineStats()
-    for val in iter_numeric_column(file_path, col):
-        s.update(val)
-    return s
\ No newline at end of file
+    for batch in iter_numeric_batches(file_path, col):
+        s.update_batch(batch)
+    return s
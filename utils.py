@@ -1,7 +1,57 @@
+import hashlib
+import os
 from typing import Iterable, Iterator
 
+try:
+    from xxhash import xxh3_128_digest as digest128
+except ImportError:  # optional dependency: pip install file-manipulator[fast]
+    def digest128(data: bytes) -> bytes:
+        """16-byte fingerprint of data (xxh3_128 when installed, blake2b otherwise)."""
+        return hashlib.blake2b(data, digest_size=16).digest()
+
 
 def iter_lines(path: str) -> Iterator[str]:
     with open(path, "r", encoding="utf-8", errors="ignore") as f:
         for line in f:
-            yield line
\ No newline at end of file
+            yield line
+
+
+def iter_lines_bytes(path: str, chunk: int = 1 << 20, start: int = 0, end: int | None = None) -> Iterator[bytes]:
+    """
+    Yields raw lines (line endings kept) without paying for text decoding.
+    Lines end at b"\n" only, as in binary file iteration; a lone b"\r" is line content.
+    start/end restrict reading to the byte range [start, end), which should begin
+    and end on line boundaries (see split_line_ranges).
+    """
+    with open(path, "rb", buffering=chunk) as f:
+        if start:
+            f.seek(start)
+        if end is None:
+            yield from f
+            return
+        # Count bytes rather than call f.tell() per line, which is several times slower
+        pos = start
+        for line in f:
+            yield line
+            pos += len(line)
+            if pos >= end:
+                break
+
+
+def split_line_ranges(path: str, parts: int) -> list[tuple[int, int]]:
+    """
+    Splits a file into up to `parts` contiguous (start, end) byte ranges, each ending
+    just after a newline so that no line straddles two ranges.
+    """
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, "rb") as f:
+        for i in range(1, parts):
+            f.seek(max(size * i // parts, bounds[-1]))
+            f.readline()
+            pos = f.tell()
+            if pos >= size:
+                break
+            bounds.append(pos)
+    bounds.append(size)
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]